@@ -1,10 +1,44 @@
 import argparse
+import asyncio
+import base64
+import binascii
+import contextlib
+import errno
+import gzip
+import hashlib
 import io
 import json
+import logging
+import logging.handlers
+import mmap
 import os
+import re
+import shutil
 import sys
 import tarfile
-import requests
+import threading
+import zlib
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+
+# orjson parses large registry json several times faster; fall back to the standard library without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ISA-L decompresses gzip with SIMD instructions, several times faster than zlib
+try:
+    from isal import igzip, isal_zlib
+except ImportError:
+    igzip = isal_zlib = None
+
+# io_uring batches the open/write/close syscalls of tarball extraction; only available on Linux
+try:
+    import liburing
+except ImportError:
+    liburing = None
 
 
 PACKAGE_FILE = 'package.json'
@@ -12,6 +46,72 @@ NODE_MODULES_FILE = 'node_modules.json'
 REGISTRY_URL = 'https://registry.npmjs.org'
 LATEST = "latest"
 NODE_MODULES_DIR = "node_modules"
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".pm-cache", "metadata")
+VERSION_PREFIX = "~^="
+# Comparators, hyphen ranges and unions cannot be reduced to a single version without a semver resolver
+VERSION_RANGE = re.compile(r"[<>|\s]")
+EXACT_VERSION = re.compile(r"\d+\.\d+\.\d+(-[0-9A-Za-z.-]+)?(\+[0-9A-Za-z.-]+)?")
+# Ask for the abbreviated install metadata, falling back to full json if the registry does not serve it
+METADATA_ACCEPT = "application/vnd.npm.install-v1+json; q=1.0, application/json; q=0.8, */*"
+MAX_CONNECTIONS = 32
+MAX_CONCURRENT_REQUESTS = 16
+KEEPALIVE_TIMEOUT = 30
+REQUEST_TIMEOUT = 30
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.3
+IO_URING_BATCH = 64
+# Tarballs are extracted on a pool sized to the CPU count to avoid thrashing the disk
+EXTRACT_WORKERS = os.cpu_count() or 1
+INTEGRITY_ALGORITHMS = ["sha512", "sha384", "sha256", "sha1"]
+# Errors a truncated or corrupted tarball download can raise while it is being extracted
+EXTRACT_ERRORS = (tarfile.TarError, EOFError, OSError, zlib.error, httpx.HTTPError) + ((isal_zlib.error,) if isal_zlib else ())
+LOG_BUFFER_CAPACITY = 1024
+
+log = logging.getLogger("pm")
+
+# Registry json already looked up by this process, keyed on (package name, normalized version)
+METADATA_MEMO = {}
+
+def configure_logging():
+    """
+    Send install progress to stdout through a buffered handler.
+    Messages are collected in memory and written out in batches rather than one write per message.
+    """
+
+    handler = logging.handlers.MemoryHandler(LOG_BUFFER_CAPACITY, target=logging.StreamHandler(sys.stdout))
+    log.addHandler(handler)
+    log.setLevel(logging.INFO)
+
+def load_json(data):
+    """
+    Parse json from bytes, using orjson when it is available.
+
+    Args:
+        data (bytes): The json document.
+
+    Returns:
+        The parsed json value.
+    """
+
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dump_json(obj, indent=True):
+    """
+    Serialize a value to json bytes, using orjson when it is available.
+
+    Args:
+        obj: The value to serialize.
+        indent (bool): Whether to indent the output by two spaces.
+
+    Returns:
+        bytes: The json document.
+    """
+
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode()
 
 def init_package_file(name, version, description, author, license):
     """
@@ -26,13 +126,13 @@ def init_package_file(name, version, description, author, license):
     """
 
     if not os.path.exists(PACKAGE_FILE):
-        with open(PACKAGE_FILE, 'w') as f:
+        with open(PACKAGE_FILE, 'wb') as f:
             init = {"name": name,
                     "version": version,
                     "description": description,
                     "author": author,
                     "license": license} 
-            json.dump(init, f, indent=2)    
+            f.write(dump_json(init))
 
 def init_node_modules_file():
     """
@@ -41,8 +141,38 @@ def init_node_modules_file():
     """
 
     if not os.path.exists(NODE_MODULES_FILE):
-        with open(NODE_MODULES_FILE, "w") as f:
-            json.dump({}, f, indent=2)
+        with open(NODE_MODULES_FILE, 'wb') as f:
+            f.write(dump_json({}))
+
+def load_node_modules_file():
+    """
+    Read the installed packages from node_modules.json.
+    With orjson the file is memory-mapped and parsed straight from the page cache, without copying it first.
+
+    Returns:
+        dict: Installed packages and their versions.
+    """
+
+    with open(NODE_MODULES_FILE, 'rb') as f:
+        # An empty file cannot be mapped; let the parser report it
+        if orjson is None or os.fstat(f.fileno()).st_size == 0:
+            return load_json(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return orjson.loads(view)
+
+def save_node_modules_file(node_modules_data):
+    """
+    Write the installed packages back to node_modules.json.
+    The file is replaced atomically so an interrupted write never leaves it truncated.
+
+    Args:
+        node_modules_data (dict): Installed packages and their versions.
+    """
+
+    tmp_path = NODE_MODULES_FILE + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(dump_json(node_modules_data))
+    os.replace(tmp_path, NODE_MODULES_FILE)
 
 def add(arg):
     """
@@ -74,8 +204,8 @@ def add_dependency(package, version):
         print("package.json has not been created, run init command first")
         return
     
-    with open(PACKAGE_FILE, 'r') as f:
-        package_data = json.load(f)
+    with open(PACKAGE_FILE, 'rb') as f:
+        package_data = load_json(f.read())
 
     # If not dependencies have been added to package.json file
     if 'dependencies' not in package_data:
@@ -84,8 +214,8 @@ def add_dependency(package, version):
     # Add the package and its version and key, value pair in dependencies object
     package_data['dependencies'][package] = version
 
-    with open(PACKAGE_FILE, 'w') as f:
-        json.dump(package_data, f, indent=2)
+    with open(PACKAGE_FILE, 'wb') as f:
+        f.write(dump_json(package_data))
     print(f"Added {package}@{version} to {PACKAGE_FILE}")
 
 def install_dependencies():
@@ -93,106 +223,760 @@ def install_dependencies():
     Install all dependencies listed in package.json file.
     """
 
-    with open(PACKAGE_FILE, 'r') as f:
-        package_data = json.load(f)
+    # Not allowing user to install dependencies/package unless package.json has been created;
+    # checked once here rather than for every package installed
+    if not os.path.exists(PACKAGE_FILE):
+        print("package.json has not been created, run init command first")
+        return
+
+    with open(PACKAGE_FILE, 'rb') as f:
+        package_data = load_json(f.read())
 
     dependencies = package_data.get('dependencies', {})
 
-    # For each package in package.json, install the pacakge and its version
-    for package_name, version in dependencies.items():
-        print(f"Installing {package_name}@{version}...")
-        install_package(package_name, version, set())
+    # The extraction pool lives outside the event loop: extraction workers wait on the loop
+    # for download chunks, so shutting the pool down must never block the loop
+    extract_pool = ThreadPoolExecutor(max_workers=EXTRACT_WORKERS)
+    try:
+        asyncio.run(install_all(dependencies, extract_pool))
+    except BaseException:
+        extract_pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    else:
+        extract_pool.shutdown()
+    finally:
+        # Write out the install progress that is still buffered
+        for handler in log.handlers:
+            handler.flush()
 
-def install_package(package_name, version, track):
+async def install_all(dependencies, extract_pool):
     """
-    Install a specific package with the given version.
-    Use track to detect Circular Depedency
+    Resolve and install the given dependencies over a shared HTTP/2 client.
 
     Args:
-        package_name (str): The name of the package to install.
-        version (str): The version of the package to install.
-        track (set): A set of packages names that were installed.
+        dependencies (dict): Mapping of package names to versions.
+        extract_pool (ThreadPoolExecutor): Worker threads that extract tarballs.
     """
 
-    # If package name has already been installed, there is a circular dependency
-    if package_name in track:
-        print(f"Circular dependency detected; exiting installation")
-        return
-    track.add(package_name)
-    
-    # Not allowing user to install dependencies/package unless package.json has been created
-    if not os.path.exists(PACKAGE_FILE):
-        print("package.json has not been created, run init command first")
-        return
+    # Keep connections to the registry and tarball hosts alive so TLS handshakes are paid once;
+    # HTTP/2 multiplexes the concurrent requests to each host over a single connection
+    limits = httpx.Limits(max_connections=MAX_CONNECTIONS, keepalive_expiry=KEEPALIVE_TIMEOUT)
+    sem = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    # A tarball is only requested once a worker is free to read it; an unread HTTP/2 stream
+    # would hold on to the connection's flow control window and stall the other downloads
+    extract_sem = asyncio.Semaphore(EXTRACT_WORKERS)
 
     # Create node module file to keep track of installed packages and their version
     init_node_modules_file()
-    with open(NODE_MODULES_FILE, 'r') as f:
-        node_modules_data = json.load(f)
+    node_modules_data = load_node_modules_file()
+
+    async with httpx.AsyncClient(http2=True, limits=limits, timeout=REQUEST_TIMEOUT) as client:
+        for package_name, version in dependencies.items():
+            log.info(f"Installing {package_name}@{version}...")
+        resolved = await resolve(dependencies, node_modules_data, client, sem)
+
+        graph = {package_name: [dep for dep in sub_dependencies if dep in resolved]
+                 for package_name, (version, package_info, sub_dependencies) in resolved.items()}
+        order, cycles = topological_order(graph)
+        for cycle in cycles:
+            log.warning(f"Circular dependency detected between {', '.join(cycle)}")
+
+        # A package starts installing as soon as all of its dependencies are installed;
+        # packages in a cycle only wait for the dependencies scheduled before them
+        tasks = {}
+        try:
+            for package_name in order:
+                version, package_info, sub_dependencies = resolved[package_name]
+                dependency_tasks = [tasks[dep] for dep in graph[package_name] if dep in tasks]
+                tasks[package_name] = asyncio.create_task(install_after(
+                    dependency_tasks, package_name, version, package_info, node_modules_data,
+                    client, sem, extract_sem, extract_pool))
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            # Stop the other installs so their downloads and extraction workers are released
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        finally:
+            # Installed packages are recorded in memory and written out once
+            save_node_modules_file(node_modules_data)
+
+async def resolve(dependencies, node_modules_data, client, sem):
+    """
+    Resolve the full dependency graph breadth-first, visiting each package only once.
+    Every level of the graph is looked up in parallel.
+
+    Args:
+        dependencies (dict): Mapping of package names to versions.
+        node_modules_data (dict): Installed packages and their versions.
+        client (httpx.AsyncClient): Client used for registry requests.
+        sem (asyncio.Semaphore): Limits the number of in-flight requests.
+
+    Returns:
+        dict: Mapping of package names to (version, package json, dependency names) tuples.
+              The package json is None for packages that are already installed.
+    """
+
+    resolved = {}
+    frontier = dict(dependencies)
+    while frontier:
+        results = await asyncio.gather(*[
+            resolve_package(package_name, version, node_modules_data, client, sem)
+            for package_name, version in frontier.items()
+        ])
+
+        next_frontier = {}
+        for (package_name, version), result in zip(frontier.items(), results):
+            if result is None:
+                continue
+            package_info, sub_dependencies = result
+            resolved[package_name] = (version, package_info, list(sub_dependencies))
+            for sub_package_name, sub_version in sub_dependencies.items():
+                if sub_package_name not in resolved and sub_package_name not in frontier:
+                    next_frontier.setdefault(sub_package_name, sub_version)
+        frontier = next_frontier
+    return resolved
+
+def topological_order(graph):
+    """
+    Order packages so that every package comes after its dependencies, using Tarjan's strongly
+    connected components algorithm. The members of a Circular Depedency are ordered next to each other.
+
+    Args:
+        graph (dict): Mapping of package names to the names of their dependencies.
+
+    Returns:
+        tuple: The ordered package names and the cycles found, each a list of the packages in it.
+    """
+
+    index = {}
+    lowlink = {}
+    stack = []
+    on_stack = set()
+    order = []
+    cycles = []
+    for root in graph:
+        if root in index:
+            continue
+        # Iterative depth first search, each frame holds a package and the dependencies left to visit
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        frames = [(root, iter(graph[root]))]
+        while frames:
+            package_name, deps = frames[-1]
+            for dep in deps:
+                if dep not in index:
+                    index[dep] = lowlink[dep] = len(index)
+                    stack.append(dep)
+                    on_stack.add(dep)
+                    frames.append((dep, iter(graph[dep])))
+                    break
+                if dep in on_stack:
+                    lowlink[package_name] = min(lowlink[package_name], index[dep])
+            else:
+                frames.pop()
+                if frames:
+                    parent = frames[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[package_name])
+                if lowlink[package_name] != index[package_name]:
+                    continue
+
+                # package_name is the root of a component; components come out dependencies first
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == package_name:
+                        break
+                component.reverse()
+                order.extend(component)
+                if len(component) > 1 or package_name in graph[package_name]:
+                    cycles.append(component)
+
+    return order, cycles
+
+async def install_after(dependency_tasks, package_name, version, package_info, node_modules_data,
+                        client, sem, extract_sem, extract_pool):
+    """
+    Install a resolved package once the installs of its dependencies have finished.
+
+    Args:
+        dependency_tasks (list): Install tasks of the package's dependencies.
+        package_name (str): The name of the package to install.
+        version (str): The version of the package to install.
+        package_info (dict): The registry json of the resolved version, or None if already installed.
+        node_modules_data (dict): Installed packages and their versions, updated in place.
+        client (httpx.AsyncClient): Client used for registry requests.
+        sem (asyncio.Semaphore): Limits the number of in-flight requests.
+        extract_sem (asyncio.Semaphore): Limits the tarball downloads to the number of extraction workers.
+        extract_pool (ThreadPoolExecutor): Worker threads that extract tarballs.
+    """
+
+    await asyncio.gather(*dependency_tasks)
+    if package_info is not None:
+        await install_package_async(package_name, version, package_info, node_modules_data,
+                                    client, sem, extract_sem, extract_pool)
+
+async def resolve_package(package_name, version, node_modules_data, client, sem):
+    """
+    Look up a single package and its dependencies.
+
+    Args:
+        package_name (str): The name of the package to look up.
+        version (str): The version of the package to look up.
+        node_modules_data (dict): Installed packages and their versions.
+        client (httpx.AsyncClient): Client used for registry requests.
+        sem (asyncio.Semaphore): Limits the number of in-flight requests.
+
+    Returns:
+        tuple: The package json (None if already installed) and its dependencies,
+               or None if the package could not be retrieved.
+    """
 
-    # Check if the package is already installed in node_modules.json
-    if package_name in node_modules_data and node_modules_data[package_name] == version:
-        print(f"{package_name}@{version} is already installed.")
+    # Check if the package is already installed in node_modules.json; packages extracted with the
+    # old nested package/ layout have no top-level package.json and are reinstalled
+    recorded = package_name in node_modules_data and node_modules_data[package_name] == version
+    if recorded and read_installed_package(package_name) is not None:
+        log.info(f"{package_name}@{version} is already installed.")
         # In case we downloaded a package without it dependencies via manual download
-        check_subdependencies(package_name, track)
-        return
-    
-    # Update node_modules.json
-    node_modules_data[package_name] = version
-    with open(NODE_MODULES_FILE, 'w') as f:
-        json.dump(node_modules_data, f, indent=2)
+        return None, check_subdependencies(package_name)
+
+    exact_version = normalize_version(version)
+    if exact_version is None:
+        log.warning(f"Version range {version} for {package_name} is not supported")
+        return None
+
+    package_info = await fetch_metadata(package_name, exact_version, client, sem)
+    if package_info is None:
+        log.warning(f"Package retrieval for {package_name} for version {exact_version} failed")
+        return None
+
+    # A different version spec can still resolve to the version that is already installed
+    installed_package = read_installed_package(package_name)
+    if installed_package is not None and installed_package.get('version') == package_info['version']:
+        log.info(f"{package_name}@{package_info['version']} is already installed.")
+        node_modules_data[package_name] = version
+        return None, installed_package.get('dependencies', {})
+    return package_info, package_info.get('dependencies', {})
+
+def normalize_version(version):
+    """
+    Reduce a version spec to the version requested from the registry.
+    The ^, ~ and = operators and a leading v are removed; an empty spec or * means latest.
+
+    Args:
+        version (str): The version spec as listed in a package.json.
 
-    # Remove prefix of version if exists (ie ^ or ~)
-    if version[0] in ["~", "^"]:
+    Returns:
+        str: The version to request from the registry, or None if the spec is a range
+             such as >=1.0.0 <2.0.0 that is not supported.
+    """
+
+    version = version.strip().lstrip(VERSION_PREFIX)
+    if version[:1] == "v" and version[1:2].isdigit():
         version = version[1:]
-    
-    # Create URL for package and the version and submit API request for corresponding json
-    url = f"{REGISTRY_URL}/{package_name}/{version}"
-    response = requests.get(url)
-    if response.status_code != 200:
-        print(f"Package retrieval for {package_name} for version {version} failed")
-        return 
-    
-    package_info = response.json()
-    if version == LATEST:
-        version = package_info['version']
+    if version in ["", "*"]:
+        return LATEST
+    if VERSION_RANGE.search(version):
+        return None
+    return version
+
+async def install_package_async(package_name, version, package_info, node_modules_data, client, sem, extract_sem,
+                                extract_pool):
+    """
+    Install a specific resolved package.
+
+    Args:
+        package_name (str): The name of the package to install.
+        version (str): The version of the package to install.
+        package_info (dict): The registry json of the resolved version.
+        node_modules_data (dict): Installed packages and their versions, updated in place.
+        client (httpx.AsyncClient): Client used for registry requests.
+        sem (asyncio.Semaphore): Limits the number of in-flight requests.
+        extract_sem (asyncio.Semaphore): Limits the tarball downloads to the number of extraction workers.
+        extract_pool (ThreadPoolExecutor): Worker threads that extract tarballs.
+    """
 
     # Retrieve tar file url and submit an API request
     tarball_url = package_info['dist']['tarball']
-    response_tar = requests.get(tarball_url)
-    if response_tar.status_code != 200:
-        print("Package instalation from json has failed")
-        return 
+    async with extract_sem, sem, get_with_retry(client, tarball_url) as response_tar:
+        if response_tar.status_code != 200:
+            log.warning("Package instalation from json has failed")
+            return 
+
+        # Start from an empty directory so nothing is left over from an earlier install or layout
+        package_dir = os.path.join(NODE_MODULES_DIR, package_name)
+        shutil.rmtree(package_dir, ignore_errors=True)
+        os.makedirs(package_dir, exist_ok=True)
+
+        # Download the package, extracting it on a worker thread as the bytes arrive
+        loop = asyncio.get_running_loop()
+        expected = parse_integrity(package_info['dist'])
+        digest = hashlib.new(expected[0]) if expected else None
+        tarball = TarballStream(response_tar.aiter_bytes(), loop, digest)
+        try:
+            await loop.run_in_executor(extract_pool, extract_tarball, tarball, package_dir)
+            # tarfile can stop before the end of the gzip stream; the rest still has to be hashed
+            await loop.run_in_executor(extract_pool, tarball.readall)
+        except EXTRACT_ERRORS as e:
+            # Remove whatever was extracted before the download broke off
+            log.warning(f"Extraction failed for {package_name}@{package_info['version']}: {e}")
+            shutil.rmtree(package_dir, ignore_errors=True)
+            return
+        except BaseException:
+            # Release the worker if it is still waiting for the next chunk of the download
+            tarball.cancel()
+            raise
+
+    # Remove the extracted files if the tarball is not the one the registry published
+    if expected and digest.digest() != expected[1]:
+        log.warning(f"Integrity check failed for {package_name}@{package_info['version']}")
+        shutil.rmtree(package_dir, ignore_errors=True)
+        return
+
+    node_modules_data[package_name] = version
+    log.info(f"Installed {package_name}@{package_info['version']}")
+
+def parse_integrity(dist):
+    """
+    Pick the expected digest of a tarball from the dist section of its registry json.
+    The strongest hash in dist.integrity is preferred, falling back to the sha1 in dist.shasum.
+
+    Args:
+        dist (dict): The dist section of the package json.
+
+    Returns:
+        tuple: The hashlib algorithm name and the expected digest, or None if the registry gave neither.
+    """
+
+    # integrity is a Subresource Integrity string, ie "sha512-<base64 digest>", possibly several of them
+    # Malformed entries are skipped so that a weaker hash or the shasum can still be checked
+    hashes = {}
+    for entry in dist.get('integrity', '').split():
+        algorithm, _, value = entry.partition('-')
+        try:
+            hashes[algorithm] = base64.b64decode(value.partition('?')[0], validate=True)
+        except binascii.Error:
+            log.warning(f"Ignoring malformed integrity value {entry}")
+    for algorithm in INTEGRITY_ALGORITHMS:
+        if algorithm in hashes:
+            return algorithm, hashes[algorithm]
+
+    if 'shasum' in dist:
+        try:
+            return 'sha1', bytes.fromhex(dist['shasum'])
+        except ValueError:
+            log.warning(f"Ignoring malformed shasum {dist['shasum']}")
+    return None
+
+@contextlib.asynccontextmanager
+async def get_with_retry(client, url, headers=None):
+    """
+    Submit a streamed GET request, retrying connection failures and server errors with exponential backoff.
+    The response is closed when the context exits.
+
+    Args:
+        client (httpx.AsyncClient): Client used for registry requests.
+        url (str): The URL to request.
+        headers (dict): Extra headers to send with the request.
+
+    Yields:
+        httpx.Response: The response of the last attempt, with its body not yet read.
+    """
+
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            response = await client.send(client.build_request("GET", url, headers=headers), stream=True)
+        except httpx.TransportError:
+            if attempt == MAX_RETRIES:
+                raise
+        else:
+            if response.status_code < 500 or attempt == MAX_RETRIES:
+                break
+            await response.aclose()
+        await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+    try:
+        yield response
+    finally:
+        await response.aclose()
+
+async def fetch_metadata(package_name, version, client, sem):
+    """
+    Retrieve the registry json for a package version, looking it up at most once per process.
+    Different specs that normalize to the same version share the lookup.
+
+    Args:
+        package_name (str): The name of the package.
+        version (str): The version of the package, without a range prefix.
+        client (httpx.AsyncClient): Client used for registry requests.
+        sem (asyncio.Semaphore): Limits the number of in-flight requests.
+
+    Returns:
+        dict: The package json, or None if the retrieval failed.
+    """
+
+    key = (package_name, version)
+    if key in METADATA_MEMO:
+        return METADATA_MEMO[key]
+
+    package_info = await load_metadata(package_name, version, client, sem)
+    # Failed lookups are not remembered so that a later install can retry them
+    if package_info is not None:
+        METADATA_MEMO[key] = package_info
+    return package_info
+
+async def load_metadata(package_name, version, client, sem):
+    """
+    Retrieve the registry json for a package version, backed by an on-disk cache.
+    Published versions never change, so exact versions are read straight from the cache;
+    anything else is revalidated with the cached ETag and Last-Modified headers.
+
+    Args:
+        package_name (str): The name of the package.
+        version (str): The version of the package, without a range prefix.
+        client (httpx.AsyncClient): Client used for registry requests.
+        sem (asyncio.Semaphore): Limits the number of in-flight requests.
+
+    Returns:
+        dict: The package json, or None if the retrieval failed.
+    """
+
+    # Create URL for package and the version and look for a cached copy of its json
+    loop = asyncio.get_running_loop()
+    url = f"{REGISTRY_URL}/{package_name}/{version}"
+    cache_path = os.path.join(CACHE_DIR, hashlib.sha1(url.encode()).hexdigest() + ".json")
+    cached = await loop.run_in_executor(None, read_metadata_cache, cache_path)
+    if cached and EXACT_VERSION.fullmatch(version):
+        return cached['body']
+
+    # Only gzip is accepted so the body can be inflated by decode_metadata
+    headers = {'Accept': METADATA_ACCEPT, 'Accept-Encoding': 'gzip'}
+    if cached and cached['etag']:
+        headers['If-None-Match'] = cached['etag']
+    if cached and cached['last_modified']:
+        headers['If-Modified-Since'] = cached['last_modified']
+
+    # Submit API request for corresponding json, reusing the cached body if it is unchanged
+    async with sem, get_with_retry(client, url, headers) as response:
+        if response.status_code == 304 and cached:
+            return cached['body']
+        if response.status_code != 200:
+            return None
+        raw = b"".join([chunk async for chunk in response.aiter_raw()])
+        content_encoding = response.headers.get('Content-Encoding')
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+
+    # Inflating and parsing a large packument on the event loop would stall every other download
+    body = await loop.run_in_executor(None, decode_metadata, raw, content_encoding)
+    entry = {"etag": etag, "last_modified": last_modified, "body": body}
+    await loop.run_in_executor(None, write_metadata_cache, cache_path, entry)
+    return body
+
+def decode_metadata(raw, content_encoding):
+    """
+    Decompress and parse a registry response body.
+
+    Args:
+        raw (bytes): The body as it was sent by the registry.
+        content_encoding (str): The Content-Encoding header of the response, if any.
+
+    Returns:
+        dict: The package json.
+    """
+
+    if content_encoding == "gzip":
+        raw = igzip.decompress(raw) if igzip is not None else gzip.decompress(raw)
+    return load_json(raw)
+
+def read_metadata_cache(cache_path):
+    """
+    Read a cached registry response.
+
+    Args:
+        cache_path (str): The path of the cache entry.
+
+    Returns:
+        dict: The cached etag, last_modified and body, or None if nothing usable is cached.
+    """
+
+    # Opening directly saves a separate stat call on every lookup;
+    # an unreadable or corrupt entry is treated as a miss and overwritten by the next response
+    try:
+        with open(cache_path, 'rb') as f:
+            entry = load_json(f.read())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(entry, dict) or not {'etag', 'last_modified', 'body'} <= entry.keys():
+        return None
+    return entry
+
+def write_metadata_cache(cache_path, entry):
+    """
+    Store a registry response in the cache, leaving it unchanged if the cache directory is not writable.
+
+    Args:
+        cache_path (str): The path of the cache entry.
+        entry (dict): The etag, last_modified and body to cache.
+    """
+
+    # Write to a temporary file first so a partial write never replaces a good entry
+    tmp_path = cache_path + ".tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            f.write(dump_json(entry, indent=False))
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        # The cache is only an optimisation; the install carries on without it
+        log.debug(f"Could not write metadata cache {cache_path}: {e}")
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+
+class TarballStream(io.RawIOBase):
+    """
+    Blocking file-like view of a streamed response body.
+    Lets tarfile read a tarball from a worker thread while it is still downloading,
+    feeding every chunk to an optional hash object on the way.
+    """
+
+    def __init__(self, chunks, loop, digest=None):
+        self.chunks = chunks
+        self.loop = loop
+        self.digest = digest
+        self.buffer = memoryview(b"")
+        self.lock = threading.Lock()
+        self.cancelled = False
+        self.pending = None
+
+    def readable(self):
+        return True
+
+    def cancel(self):
+        """
+        Stop the download, waking up a reader that is waiting for the next chunk.
+        Later reads fail instead of scheduling work on the event loop.
+        """
+
+        with self.lock:
+            self.cancelled = True
+            if self.pending is not None:
+                self.pending.cancel()
+
+    def readinto(self, b):
+        # Pull the next chunk from the event loop once the previous one is used up
+        while not self.buffer:
+            with self.lock:
+                if self.cancelled:
+                    raise OSError(errno.ECANCELED, "Download cancelled")
+                self.pending = asyncio.run_coroutine_threadsafe(anext(self.chunks, None), self.loop)
+            try:
+                chunk = self.pending.result()
+            except concurrent.futures.CancelledError:
+                raise OSError(errno.ECANCELED, "Download cancelled") from None
+            if chunk is None:
+                return 0
+            if self.digest is not None:
+                self.digest.update(chunk)
+            self.buffer = memoryview(chunk)
+
+        size = min(len(b), len(self.buffer))
+        b[:size] = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+        return size
+
+def extract_tarball(fileobj, package_dir):
+    """
+    Extract a gzipped tarball in a single streaming pass.
+
+    Args:
+        fileobj: File-like object the tarball is read from.
+        package_dir (str): The directory to extract the package into.
+    """
+
+    # With ISA-L available the tar reader gets an already decompressed stream
+    if igzip is not None:
+        fileobj = igzip.IGzipFile(fileobj=fileobj)
+        mode = "r|"
+    else:
+        mode = "r|gz"
+
+    with tarfile.open(fileobj=fileobj, mode=mode) as tar:
+        if liburing is not None:
+            extract_with_io_uring(tar, package_dir)
+        else:
+            extract_members(tar, package_dir)
+
+def strip_package_prefix(member):
+    """
+    Drop the top-level directory (normally package/) that npm tarballs wrap their contents in,
+    so that files land directly in node_modules/<package>.
+
+    Args:
+        member (tarfile.TarInfo): The tarball member, renamed in place.
+
+    Returns:
+        bool: False if nothing is left of the member, i.e. it is the top-level directory itself.
+    """
+
+    member.name = member.name.partition("/")[2]
+    if member.islnk():
+        member.linkname = member.linkname.partition("/")[2]
+    return bool(member.name)
+
+def extract_members(tar, package_dir):
+    """
+    Extract the members of an opened tarball with tarfile.
 
-    package_dir = os.path.join(NODE_MODULES_DIR, package_name)
-    os.makedirs(package_dir, exist_ok=True)
+    Args:
+        tar (tarfile.TarFile): The opened tarball.
+        package_dir (str): The directory to extract the package into.
+    """
 
-    # Download the package
-    with tarfile.open(fileobj=io.BytesIO(response_tar.content), mode="r:gz") as tar:
-        tar.extractall(path=package_dir)
+    for member in tar:
+        if strip_package_prefix(member):
+            tar.extract(member, path=package_dir, filter="data")
 
-    print(f"Installed {package_name}@{version}")
+def extract_with_io_uring(tar, package_dir):
+    """
+    Extract the members of an opened tarball, writing regular files in batches through io_uring.
+    Falls back to tarfile when the kernel does not allow io_uring.
 
+    Args:
+        tar (tarfile.TarFile): The opened tarball.
+        package_dir (str): The directory to extract the package into.
+    """
 
-    check_subdependencies(package_name, track)
+    ring = liburing.Ring()
+    cqe = liburing.Cqe()
+    try:
+        liburing.io_uring_queue_init(IO_URING_BATCH * 3, ring)
+    except OSError:
+        extract_members(tar, package_dir)
+        return
+    # Sparse file registration needs a newer kernel than io_uring itself
+    try:
+        liburing.io_uring_register_files_sparse(ring, IO_URING_BATCH)
+    except OSError:
+        liburing.io_uring_queue_exit(ring)
+        extract_members(tar, package_dir)
+        return
 
-def check_subdependencies(package_name, track):
+    try:
+        root = os.path.abspath(package_dir)
+        batch = []
+        for member in tar:
+            if not strip_package_prefix(member):
+                continue
+            if not member.isfile():
+                # Links may point at files that are still waiting in the batch
+                if batch:
+                    write_io_uring_batch(ring, cqe, batch)
+                    batch = []
+                tar.extract(member, path=package_dir, filter="data")
+                continue
+
+            # The data filter resolves the links already extracted, so a file cannot be written
+            # outside of the package directory through an earlier symlink member
+            member = tarfile.data_filter(member, root)
+            path = os.path.join(root, member.name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            batch.append((path, tar.extractfile(member).read(), member.mode & 0o777))
+            if len(batch) == IO_URING_BATCH:
+                write_io_uring_batch(ring, cqe, batch)
+                batch = []
+        if batch:
+            write_io_uring_batch(ring, cqe, batch)
+    finally:
+        liburing.io_uring_queue_exit(ring)
+
+def write_io_uring_batch(ring, cqe, batch):
     """
-    Check and install dependencies of an installed package.
+    Write a batch of files with a single io_uring submission.
+    Each file is a linked open, write and close chain on its own registered file slot.
+
+    Args:
+        ring (liburing.Ring): The initialized ring.
+        cqe (liburing.Cqe): Completion queue entries of the ring.
+        batch (list): (path, data, mode) tuples, at most IO_URING_BATCH long.
+    """
+
+    # The batch keeps the paths and data alive until the kernel has completed every entry
+    for index, (path, data, mode) in enumerate(batch):
+        sqe = liburing.io_uring_get_sqe(ring)
+        liburing.io_uring_prep_open_direct(sqe, path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, index, mode)
+        liburing.io_uring_sqe_set_flags(sqe, liburing.IOSQE_IO_LINK)
+        liburing.io_uring_sqe_set_data64(sqe, index * 3)
+        sqe = liburing.io_uring_get_sqe(ring)
+        liburing.io_uring_prep_write(sqe, index, data, 0)
+        liburing.io_uring_sqe_set_flags(sqe, liburing.IOSQE_IO_LINK | liburing.IOSQE_FIXED_FILE)
+        liburing.io_uring_sqe_set_data64(sqe, index * 3 + 1)
+        sqe = liburing.io_uring_get_sqe(ring)
+        liburing.io_uring_prep_close_direct(sqe, index)
+        liburing.io_uring_sqe_set_data64(sqe, index * 3 + 2)
+
+    submitted = liburing.io_uring_submit(ring)
+
+    # Reap the completions one at a time so the ring head wraps around correctly,
+    # and mark every one as seen even when it failed
+    error = None
+    for _ in range(submitted):
+        liburing.io_uring_wait_cqe(ring, cqe)
+        entry = cqe[0]
+        index, op = divmod(entry.user_data, 3)
+        path, data, mode = batch[index]
+        try:
+            # Negative results are raised as OSError by the binding
+            res = entry.res
+            if op == 1 and res < len(data):
+                raise OSError(errno.EIO, f"Short write ({res} of {len(data)} bytes)", path)
+        except OSError as e:
+            # A failed open cancels the rest of its chain, so keep the original error
+            if error is None or error.errno == errno.ECANCELED:
+                error = e
+        finally:
+            liburing.io_uring_cqe_seen(ring, entry)
+
+    if error is not None:
+        raise error
+
+def read_installed_package(package_name):
+    """
+    Read the package.json of an installed package.
+
+    Args:
+        package_name (str): The name of the installed package.
+
+    Returns:
+        dict: The contents of the package.json, or None if the package is not installed.
+    """
+
+    package_path = os.path.join(NODE_MODULES_DIR, package_name, PACKAGE_FILE)
+    try:
+        with open(package_path, 'rb') as f:
+            return load_json(f.read())
+    except FileNotFoundError:
+        return None
+
+def check_subdependencies(package_name):
+    """
+    Read the dependencies of an installed package from its package.json.
 
     Args:
         package_name (str): The name of the package to check for subdependencies.
-        track (set): A set of packages names that were installed.
+
+    Returns:
+        dict: Mapping of subdependency names to versions.
     """
 
-    # Check and install dependencies of the installed package
-    package_path = f"node_modules/{package_name}/package/package.json"
-    if os.path.exists(package_path):
-        with open(package_path, 'r') as f:
-            package_data = json.load(f)
-        sub_dependencies = package_data.get('dependencies', {})
-        for sub_package_name, sub_version in sub_dependencies.items():
-            install_package(sub_package_name, sub_version, track)
+    installed_package = read_installed_package(package_name)
+    if installed_package is None:
+        return {}
+    return installed_package.get('dependencies', {})
 
 def main():
     parser = argparse.ArgumentParser(description="Simple Package Manager")
@@ -210,6 +994,7 @@ def main():
     subparser.add_parser("install", help="Install all dependencies in package.json")
 
     args = parser.parse_args()
+    configure_logging()
 
     if len(sys.argv) < 2:
         print("Enter a command")